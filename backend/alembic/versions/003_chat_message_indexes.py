@@ -0,0 +1,51 @@
+"""Composite indexes for chat list and unread-count queries.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-08-31 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Unread-count aggregates filter on (chat_id, is_read) with is_read=false
+    op.create_index(
+        'ix_messages_chat_read', 'messages', ['chat_id', 'is_read'],
+        postgresql_where=sa.text('is_read = false'),
+    )
+    # Last-message window and message paging sort by created_at per chat
+    op.create_index(
+        'ix_messages_chat_created', 'messages',
+        ['chat_id', sa.text('created_at DESC')],
+    )
+    # Chat list filters on buyer/seller with is_active=true
+    op.create_index(
+        'ix_chats_buyer_active', 'chats', ['buyer_id'],
+        postgresql_where=sa.text('is_active'),
+    )
+    op.create_index(
+        'ix_chats_seller_active', 'chats', ['seller_id'],
+        postgresql_where=sa.text('is_active'),
+    )
+    # Chat list ordering
+    op.create_index(
+        'ix_chats_last_msg', 'chats',
+        [sa.text('last_message_at DESC NULLS LAST')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chats_last_msg')
+    op.drop_index('ix_chats_seller_active')
+    op.drop_index('ix_chats_buyer_active')
+    op.drop_index('ix_messages_chat_created')
+    op.drop_index('ix_messages_chat_read')
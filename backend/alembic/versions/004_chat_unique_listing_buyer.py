@@ -0,0 +1,79 @@
+"""Unique (listing_id, buyer_id) constraint on chats for upsert.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-08-31 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Merge accidental duplicates before adding the constraint: the oldest
+    # chat per (listing_id, buyer_id) survives, with id breaking created_at
+    # ties so exactly one row is kept. Messages are re-parented onto the
+    # survivor first — deleting up front would cascade them away via the
+    # messages.chat_id FK — and the greatest last_message_at carried over.
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY listing_id, buyer_id
+                       ORDER BY created_at, id
+                   ) AS keep_id
+            FROM chats
+        )
+        UPDATE messages m
+        SET chat_id = r.keep_id
+        FROM ranked r
+        WHERE m.chat_id = r.id
+          AND r.id <> r.keep_id
+    """)
+    op.execute("""
+        WITH ranked AS (
+            SELECT id, last_message_at,
+                   first_value(id) OVER (
+                       PARTITION BY listing_id, buyer_id
+                       ORDER BY created_at, id
+                   ) AS keep_id
+            FROM chats
+        ),
+        merged AS (
+            SELECT keep_id, max(last_message_at) AS max_last
+            FROM ranked
+            GROUP BY keep_id
+            HAVING count(*) > 1
+        )
+        UPDATE chats c
+        SET last_message_at = merged.max_last
+        FROM merged
+        WHERE c.id = merged.keep_id
+    """)
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY listing_id, buyer_id
+                       ORDER BY created_at, id
+                   ) AS keep_id
+            FROM chats
+        )
+        DELETE FROM chats
+        USING ranked r
+        WHERE chats.id = r.id
+          AND r.id <> r.keep_id
+    """)
+    op.create_unique_constraint(
+        'uq_chats_listing_buyer', 'chats', ['listing_id', 'buyer_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_chats_listing_buyer', 'chats')
@@ -1,17 +1,22 @@
 """Chat endpoints."""
 
 import asyncio
-from datetime import UTC, datetime
-from uuid import UUID
+from datetime import datetime
+from uuid import UUID, uuid4
 
+import orjson
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import or_, select, func
+from sqlalchemy import or_, select, func, text, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, raiseload, selectinload
 
 from app.api.deps import CurrentUser
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import async_session_factory, get_db
 from app.models.chat import Chat, Message
 from app.models.listing import Listing
 from app.models.user import User
@@ -20,6 +25,91 @@ from app.services.notifications import notify_new_message
 router = APIRouter()
 
 
+# Access check + message insert + chat timestamp update, fused into one
+# round-trip: the INSERT only fires when the sender is a participant, and
+# the UPDATE only fires when the INSERT did
+_SEND_MESSAGE_SQL = text("""
+    WITH ins AS (
+        INSERT INTO messages (id, chat_id, sender_id, text)
+        SELECT :mid, c.id, :uid, :txt
+        FROM chats c
+        WHERE c.id = :cid AND (c.buyer_id = :uid OR c.seller_id = :uid)
+        RETURNING id, chat_id, sender_id, text, image_url, is_read, created_at
+    ), upd AS (
+        UPDATE chats SET last_message_at = now()
+        WHERE id = :cid AND EXISTS (SELECT 1 FROM ins)
+    )
+    SELECT ins.id, ins.chat_id, ins.sender_id, ins.text, ins.image_url,
+           ins.is_read, ins.created_at,
+           u.telegram_id AS recipient_telegram_id,
+           c.listing_id,
+           l.title AS listing_title
+    FROM ins
+    JOIN chats c ON c.id = ins.chat_id
+    LEFT JOIN users u ON u.id = CASE WHEN c.buyer_id = ins.sender_id
+                                     THEN c.seller_id ELSE c.buyer_id END
+    LEFT JOIN listings l ON l.id = c.listing_id
+""")
+
+
+# Short-lived cache of listing snapshots for the open-chat hot path;
+# listings change rarely relative to how often chats are opened
+_listing_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_listing_cache_lock = asyncio.Lock()
+
+
+async def _get_listing_snapshot(
+    db: AsyncSession, listing_id: UUID
+) -> tuple | None:
+    """Get (user_id, title, price, first_image, status) for a listing, cached."""
+    async with _listing_cache_lock:
+        snapshot = _listing_cache.get(listing_id)
+    if snapshot is not None:
+        return snapshot
+
+    result = await db.execute(
+        select(
+            Listing.user_id, Listing.title, Listing.price,
+            Listing.images, Listing.status,
+        ).where(Listing.id == listing_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    snapshot = (
+        row.user_id, row.title, row.price,
+        row.images[0] if row.images else None, row.status,
+    )
+    async with _listing_cache_lock:
+        _listing_cache[listing_id] = snapshot
+    return snapshot
+
+
+async def _stream_json_array(items):
+    """Stream a JSON array one element at a time to keep peak memory flat."""
+    yield b"["
+    first = True
+    for item in items:
+        if first:
+            yield orjson.dumps(item)
+            first = False
+        else:
+            yield b"," + orjson.dumps(item)
+    yield b"]"
+
+
+def _loader_options(*options):
+    """Loader options for a query, plus a raiseload guard in debug mode.
+
+    The guard makes any lazy load outside the declared relationships fail
+    loudly during development instead of silently blocking the event loop.
+    """
+    if settings.DEBUG:
+        return (*options, raiseload("*"))
+    return options
+
+
 # --- Schemas ---
 
 class UnreadCountResponse(BaseModel):
@@ -78,46 +168,87 @@ async def list_chats(
     db: AsyncSession = Depends(get_db),
 ):
     """List all chats for current user."""
-    query = select(Chat).where(
+    # Scope aggregation to the caller's chats — uncorrelated subqueries
+    # would scan the whole messages table on every call
+    my_chat_ids = select(Chat.id).where(
         or_(Chat.buyer_id == user.id, Chat.seller_id == user.id),
         Chat.is_active == True,
-    ).options(
-        selectinload(Chat.listing),
-        selectinload(Chat.buyer),
-        selectinload(Chat.seller),
-        selectinload(Chat.messages),
-    ).order_by(Chat.last_message_at.desc().nullslast())
-    
+    )
+
+    # Unread count per chat, aggregated in SQL instead of loading Message rows
+    unread_sq = (
+        select(Message.chat_id, func.count().label("unread"))
+        .where(
+            Message.chat_id.in_(my_chat_ids),
+            Message.is_read == False,
+            Message.sender_id != user.id,
+        )
+        .group_by(Message.chat_id)
+        .subquery()
+    )
+
+    # Latest message per chat via LATERAL: a top-1 probe of
+    # ix_messages_chat_created per chat row
+    last_msg_sq = (
+        select(Message.text, Message.created_at)
+        .where(Message.chat_id == Chat.id)
+        .order_by(Message.created_at.desc())
+        .limit(1)
+        .lateral()
+    )
+
+    buyer = aliased(User)
+    seller = aliased(User)
+
+    query = (
+        select(
+            Chat,
+            Listing,
+            buyer,
+            seller,
+            unread_sq.c.unread,
+            last_msg_sq.c.text,
+            last_msg_sq.c.created_at,
+        )
+        .outerjoin(Listing, Chat.listing_id == Listing.id)
+        .outerjoin(buyer, Chat.buyer_id == buyer.id)
+        .outerjoin(seller, Chat.seller_id == seller.id)
+        .outerjoin(unread_sq, unread_sq.c.chat_id == Chat.id)
+        .outerjoin(last_msg_sq, true())
+        .where(
+            or_(Chat.buyer_id == user.id, Chat.seller_id == user.id),
+            Chat.is_active == True,
+        )
+        .order_by(Chat.last_message_at.desc().nullslast())
+    )
+
     result = await db.execute(query)
-    chats = result.scalars().all()
-    
-    items = []
-    for chat in chats:
-        is_seller = chat.seller_id == user.id
-        other_user = chat.buyer if is_seller else chat.seller
-        
-        # Get unread count
-        unread_count = len([m for m in chat.messages if not m.is_read and m.sender_id != user.id])
-        
-        # Get last message
-        last_msg = max(chat.messages, key=lambda m: m.created_at) if chat.messages else None
-        
-        items.append(ChatListItem(
-            id=str(chat.id),
-            listing_id=str(chat.listing_id),
-            listing_title=chat.listing.title if chat.listing else "Deleted",
-            listing_image=chat.listing.images[0] if chat.listing and chat.listing.images else None,
-            listing_price=chat.listing.price if chat.listing else 0,
-            other_user_id=str(other_user.id) if other_user else "",
-            other_user_name=other_user.display_name if other_user else "User",
-            other_user_verified=other_user.is_phone_verified if other_user else False,
-            last_message=last_msg.text if last_msg else None,
-            last_message_at=last_msg.created_at.isoformat() if last_msg else None,
-            unread_count=unread_count,
-            is_seller=is_seller,
-        ))
-    
-    return items
+    rows = result.all()
+
+    me = user.id
+
+    def _items():
+        for chat, listing, chat_buyer, chat_seller, unread, last_text, last_at in rows:
+            is_seller = chat.seller_id == me
+            other = chat_buyer if is_seller else chat_seller
+            yield {
+                "id": str(chat.id),
+                "listing_id": str(chat.listing_id),
+                "listing_title": listing.title if listing else "Deleted",
+                "listing_image": listing.images[0] if listing and listing.images else None,
+                "listing_price": listing.price if listing else 0,
+                "other_user_id": str(other.id) if other else "",
+                "other_user_name": other.display_name if other else "User",
+                "other_user_verified": other.is_phone_verified if other else False,
+                "last_message": last_text,
+                "last_message_at": last_at.isoformat() if last_at else None,
+                "unread_count": unread or 0,
+                "is_seller": is_seller,
+            }
+
+    return StreamingResponse(
+        _stream_json_array(_items()), media_type="application/json"
+    )
 
 
 @router.post("", response_model=ChatDetail)
@@ -127,47 +258,52 @@ async def create_or_get_chat(
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new chat for a listing or return existing one."""
-    # Get listing
-    listing = await db.get(Listing, listing_id)
-    if not listing:
+    # Get listing snapshot (cached)
+    snapshot = await _get_listing_snapshot(db, listing_id)
+    if snapshot is None:
         raise HTTPException(status_code=404, detail="Listing not found")
-    
+    listing_user_id, listing_title, listing_price, listing_image, listing_status = snapshot
+
     # Can't chat with yourself
-    if listing.user_id == user.id:
+    if listing_user_id == user.id:
         raise HTTPException(status_code=400, detail="Cannot chat on your own listing")
-    
-    # Check for existing chat
-    existing = await db.execute(
-        select(Chat).where(
-            Chat.listing_id == listing_id,
-            Chat.buyer_id == user.id,
+
+    # Create or reactivate the chat in one upsert round-trip
+    upsert = (
+        pg_insert(Chat)
+        .values(listing_id=listing_id, buyer_id=user.id, seller_id=listing_user_id)
+        .on_conflict_do_update(
+            index_elements=["listing_id", "buyer_id"],
+            set_={"is_active": True},
         )
+        .returning(Chat.id)
     )
-    chat = existing.scalar_one_or_none()
-    
-    if not chat:
-        # Create new chat
-        chat = Chat(
-            listing_id=listing_id,
-            buyer_id=user.id,
-            seller_id=listing.user_id,
-        )
-        db.add(chat)
-        await db.flush()
-        await db.refresh(chat)
-    
-    # Load relationships
-    await db.refresh(chat, ["listing", "buyer", "seller", "messages"])
-    
-    seller = await db.get(User, listing.user_id)
-    
+    chat_id = (await db.execute(upsert)).scalar_one()
+
+    chat_result = await db.execute(
+        select(Chat).where(Chat.id == chat_id).options(*_loader_options(
+            selectinload(Chat.seller),
+        ))
+    )
+    chat = chat_result.scalar_one()
+    seller = chat.seller
+
+    # Latest page of messages, ordered in SQL
+    msg_result = await db.execute(
+        select(Message)
+        .where(Message.chat_id == chat.id)
+        .order_by(Message.created_at.desc())
+        .limit(50)
+    )
+    messages = list(reversed(msg_result.scalars().all()))
+
     return ChatDetail(
         id=str(chat.id),
-        listing_id=str(listing.id),
-        listing_title=listing.title,
-        listing_image=listing.images[0] if listing.images else None,
-        listing_price=listing.price,
-        listing_status=listing.status,
+        listing_id=str(listing_id),
+        listing_title=listing_title,
+        listing_image=listing_image,
+        listing_price=listing_price,
+        listing_status=listing_status,
         other_user_id=str(seller.id) if seller else "",
         other_user_name=seller.display_name if seller else "Seller",
         other_user_verified=seller.is_phone_verified if seller else False,
@@ -184,7 +320,7 @@ async def create_or_get_chat(
                 created_at=m.created_at.isoformat(),
                 is_mine=m.sender_id == user.id,
             )
-            for m in sorted(chat.messages, key=lambda m: m.created_at)
+            for m in messages
         ],
     )
 
@@ -194,15 +330,16 @@ async def get_chat(
     chat_id: UUID,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, le=200),
+    before: datetime | None = None,
 ):
     """Get chat details with messages."""
     result = await db.execute(
-        select(Chat).where(Chat.id == chat_id).options(
+        select(Chat).where(Chat.id == chat_id).options(*_loader_options(
             selectinload(Chat.listing),
             selectinload(Chat.buyer),
             selectinload(Chat.seller),
-            selectinload(Chat.messages),
-        )
+        ))
     )
     chat = result.scalar_one_or_none()
     
@@ -216,11 +353,41 @@ async def get_chat(
     is_seller = chat.seller_id == user.id
     other_user = chat.buyer if is_seller else chat.seller
     
-    # Mark messages as read
-    for msg in chat.messages:
-        if msg.sender_id != user.id and not msg.is_read:
-            msg.is_read = True
-    
+    # Mark messages as read in a single bulk UPDATE
+    mark_read = (
+        update(Message)
+        .where(
+            Message.chat_id == chat_id,
+            Message.sender_id != user.id,
+            Message.is_read == False,
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Fetch only the requested page, ordered in SQL
+    msg_stmt = select(Message).where(Message.chat_id == chat_id)
+    if before:
+        msg_stmt = msg_stmt.where(Message.created_at < before)
+    msg_stmt = msg_stmt.order_by(Message.created_at.desc()).limit(limit)
+
+    async def _load_message_page():
+        # Separate session: a single AsyncSession can't run two statements
+        # concurrently, so the read-only page gets its own connection
+        async with async_session_factory() as session:
+            result = await session.execute(msg_stmt)
+            return list(reversed(result.scalars().all()))
+
+    # Overlap the independent UPDATE and SELECT round-trips
+    messages, _ = await asyncio.gather(_load_message_page(), db.execute(mark_read))
+
+    # Hoist per-row constants out of the comprehension
+    me = user.id
+    buyer_id = chat.buyer_id
+    buyer_name = chat.buyer.display_name if chat.buyer else "User"
+    seller_name = chat.seller.display_name if chat.seller else "User"
+    chat_id_str = str(chat_id)
+
     return ChatDetail(
         id=str(chat.id),
         listing_id=str(chat.listing_id),
@@ -235,16 +402,16 @@ async def get_chat(
         messages=[
             MessageResponse(
                 id=str(m.id),
-                chat_id=str(m.chat_id),
+                chat_id=chat_id_str,
                 sender_id=str(m.sender_id),
-                sender_name=chat.buyer.display_name if m.sender_id == chat.buyer_id else chat.seller.display_name,
+                sender_name=buyer_name if m.sender_id == buyer_id else seller_name,
                 text=m.text,
                 image_url=m.image_url,
-                is_read=m.is_read,
+                is_read=m.is_read or m.sender_id != me,
                 created_at=m.created_at.isoformat(),
-                is_mine=m.sender_id == user.id,
+                is_mine=m.sender_id == me,
             )
-            for m in sorted(chat.messages, key=lambda m: m.created_at)
+            for m in messages
         ],
     )
 
@@ -258,60 +425,41 @@ async def send_message(
     db: AsyncSession = Depends(get_db),
 ):
     """Send a message in a chat."""
-    # Load chat with relationships
+    message_text = body.text.strip()
+
     result = await db.execute(
-        select(Chat)
-        .where(Chat.id == chat_id)
-        .options(
-            selectinload(Chat.buyer),
-            selectinload(Chat.seller),
-            selectinload(Chat.listing),
-        )
+        _SEND_MESSAGE_SQL,
+        {"mid": uuid4(), "cid": chat_id, "uid": user.id, "txt": message_text},
     )
-    chat = result.scalar_one_or_none()
-    
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    
-    # Check access
-    if chat.buyer_id != user.id and chat.seller_id != user.id:
+    row = result.mappings().one_or_none()
+
+    if row is None:
+        # Insert was rejected: distinguish missing chat from access denied
+        exists = await db.execute(select(Chat.id).where(Chat.id == chat_id))
+        if exists.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Chat not found")
         raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Create message
-    message = Message(
-        chat_id=chat_id,
-        sender_id=user.id,
-        text=body.text.strip(),
-    )
-    db.add(message)
-    
-    # Update chat last_message_at
-    chat.last_message_at = datetime.now(UTC)
-    
-    await db.flush()
-    await db.refresh(message)
-    
+
     # Send notification to the other user
-    recipient = chat.seller if chat.buyer_id == user.id else chat.buyer
-    if recipient and recipient.telegram_id:
+    if row["recipient_telegram_id"]:
         background_tasks.add_task(
             notify_new_message,
-            recipient_telegram_id=recipient.telegram_id,
+            recipient_telegram_id=row["recipient_telegram_id"],
             sender_name=user.display_name,
-            listing_title=chat.listing.title if chat.listing else "Listing",
-            message_preview=body.text.strip(),
-            listing_id=str(chat.listing_id),
+            listing_title=row["listing_title"] or "Listing",
+            message_preview=message_text,
+            listing_id=str(row["listing_id"]),
         )
-    
+
     return MessageResponse(
-        id=str(message.id),
-        chat_id=str(message.chat_id),
-        sender_id=str(message.sender_id),
+        id=str(row["id"]),
+        chat_id=str(row["chat_id"]),
+        sender_id=str(row["sender_id"]),
         sender_name=user.display_name,
-        text=message.text,
-        image_url=message.image_url,
-        is_read=message.is_read,
-        created_at=message.created_at.isoformat(),
+        text=row["text"],
+        image_url=row["image_url"],
+        is_read=row["is_read"],
+        created_at=row["created_at"].isoformat(),
         is_mine=True,
     )
 
@@ -322,21 +470,19 @@ async def get_unread_count(
     db: AsyncSession = Depends(get_db),
 ):
     """Get total unread message count for current user."""
-    # Get all chats for this user
-    query = select(Chat).where(
-        or_(Chat.buyer_id == user.id, Chat.seller_id == user.id),
-        Chat.is_active == True,
-    ).options(selectinload(Chat.messages))
-    
-    result = await db.execute(query)
-    chats = result.scalars().all()
-    
-    # Count unread messages not sent by user
-    total_unread = sum(
-        len([m for m in chat.messages if not m.is_read and m.sender_id != user.id])
-        for chat in chats
+    # Single aggregate round-trip; no Message rows are hydrated
+    stmt = (
+        select(func.count(Message.id))
+        .join(Chat, Message.chat_id == Chat.id)
+        .where(
+            or_(Chat.buyer_id == user.id, Chat.seller_id == user.id),
+            Chat.is_active == True,
+            Message.sender_id != user.id,
+            Message.is_read == False,
+        )
     )
-    
+    total_unread = (await db.execute(stmt)).scalar_one()
+
     return UnreadCountResponse(count=total_unread)
 
 
@@ -345,11 +491,15 @@ async def get_messages(
     chat_id: UUID,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
-    after: str | None = None,
+    after: datetime | None = None,
+    limit: int = Query(100, le=500),
 ):
     """Get messages for a chat (for polling new messages)."""
-    chat = await db.get(Chat, chat_id)
-    
+    result = await db.execute(
+        select(Chat).where(Chat.id == chat_id).options(*_loader_options())
+    )
+    chat = result.scalar_one_or_none()
+
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     
@@ -360,29 +510,51 @@ async def get_messages(
     query = select(Message).where(Message.chat_id == chat_id)
     
     if after:
-        query = query.where(Message.created_at > datetime.fromisoformat(after))
-    
-    query = query.order_by(Message.created_at)
+        query = query.where(Message.created_at > after)
     
+    # Forward keyset page: clients poll again from the last created_at
+    query = query.order_by(Message.created_at).limit(limit)
+
     result = await db.execute(query)
     messages = result.scalars().all()
-    
-    # Mark as read
-    for msg in messages:
-        if msg.sender_id != user.id and not msg.is_read:
-            msg.is_read = True
-    
-    return [
-        MessageResponse(
-            id=str(m.id),
-            chat_id=str(m.chat_id),
-            sender_id=str(m.sender_id),
-            sender_name="",
-            text=m.text,
-            image_url=m.image_url,
-            is_read=m.is_read,
-            created_at=m.created_at.isoformat(),
-            is_mine=m.sender_id == user.id,
+
+    # Mark as read in a single bulk UPDATE, bounded to the returned page —
+    # messages past a full page stay unread until the client polls them
+    if messages:
+        mark_read = update(Message).where(
+            Message.chat_id == chat_id,
+            Message.sender_id != user.id,
+            Message.is_read == False,
         )
-        for m in messages
-    ]
+        if after:
+            mark_read = mark_read.where(Message.created_at > after)
+        if len(messages) == limit:
+            mark_read = mark_read.where(
+                Message.created_at <= messages[-1].created_at
+            )
+        await db.execute(
+            mark_read.values(is_read=True).execution_options(
+                synchronize_session=False
+            )
+        )
+
+    me = user.id
+    chat_id_str = str(chat_id)
+
+    def _items():
+        for m in messages:
+            yield {
+                "id": str(m.id),
+                "chat_id": chat_id_str,
+                "sender_id": str(m.sender_id),
+                "sender_name": "",
+                "text": m.text,
+                "image_url": m.image_url,
+                "is_read": m.is_read or m.sender_id != me,
+                "created_at": m.created_at.isoformat(),
+                "is_mine": m.sender_id == me,
+            }
+
+    return StreamingResponse(
+        _stream_json_array(_items()), media_type="application/json"
+    )
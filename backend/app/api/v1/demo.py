@@ -4,7 +4,7 @@ import uuid
 from datetime import UTC, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import CurrentUser
@@ -14,6 +14,9 @@ from app.models.listing import Listing
 
 router = APIRouter()
 
+# Captured once at import; checked on every request
+_ADMIN_IDS = settings.admin_ids
+
 
 @router.post("/auto-seed")
 async def auto_seed_if_empty(
@@ -22,7 +25,7 @@ async def auto_seed_if_empty(
 ):
     """Auto-seed demo listings if marketplace is empty. Admin only."""
     # Only admins can trigger
-    if user.telegram_id not in settings.admin_ids:
+    if user.telegram_id not in _ADMIN_IDS:
         return {"seeded": False, "reason": "not_admin"}
     
     # Check if any listings exist
@@ -33,15 +36,11 @@ async def auto_seed_if_empty(
         return {"seeded": False, "reason": "listings_exist", "count": count}
     
     # Seed demo listings
-    created = []
-    for item in DEMO_LISTINGS:
-        category_id = CATEGORY_IDS.get(item["category_slug"])
-        if not category_id:
-            continue
-
-        listing = Listing(
+    expires = datetime.now(UTC) + timedelta(days=30)
+    db.add_all([
+        Listing(
             user_id=user.id,
-            category_id=uuid.UUID(category_id),
+            category_id=item["category_id"],
             title=item["title"],
             description=item["description"],
             price=item["price"],
@@ -51,10 +50,11 @@ async def auto_seed_if_empty(
             area=item.get("area"),
             images=item.get("images", []),
             status="active",
-            expires_at=datetime.now(UTC) + timedelta(days=30),
+            expires_at=expires,
         )
-        db.add(listing)
-        created.append(item["title"])
+        for item in _DEMO_ITEMS
+    ])
+    created = [item["title"] for item in _DEMO_ITEMS]
 
     user.total_listings += len(created)
     await db.commit()
@@ -252,6 +252,14 @@ CATEGORY_IDS = {
     "kids-baby": "b1111111-1111-1111-1111-111111111111",
 }
 
+# Precomputed at import: category ids parsed to UUID, unknown slugs dropped
+_DEMO_UUIDS = {slug: uuid.UUID(cid) for slug, cid in CATEGORY_IDS.items()}
+_DEMO_ITEMS = [
+    dict(item, category_id=_DEMO_UUIDS[item["category_slug"]])
+    for item in DEMO_LISTINGS
+    if item["category_slug"] in _DEMO_UUIDS
+]
+
 
 @router.post("/seed-listings")
 async def seed_demo_listings(
@@ -259,23 +267,15 @@ async def seed_demo_listings(
     db: AsyncSession = Depends(get_db),
 ):
     """Seed demo listings for the current user."""
-    from app.core.config import settings
-    
     # Only admins can seed
-    if user.telegram_id not in settings.admin_ids:
-        from fastapi import HTTPException
+    if user.telegram_id not in _ADMIN_IDS:
         raise HTTPException(status_code=403, detail="Admin only")
     
-    created = []
-
-    for item in DEMO_LISTINGS:
-        category_id = CATEGORY_IDS.get(item["category_slug"])
-        if not category_id:
-            continue
-
-        listing = Listing(
+    expires = datetime.now(UTC) + timedelta(days=30)
+    rows = [
+        dict(
             user_id=user.id,
-            category_id=uuid.UUID(category_id),
+            category_id=item["category_id"],
             title=item["title"],
             description=item["description"],
             price=item["price"],
@@ -285,10 +285,13 @@ async def seed_demo_listings(
             area=item.get("area"),
             images=item.get("images", []),
             status="active",
-            expires_at=datetime.now(UTC) + timedelta(days=30),
+            expires_at=expires,
         )
-        db.add(listing)
-        created.append(item["title"])
+        for item in _DEMO_ITEMS
+    ]
+    # Single executemany INSERT instead of one flush per ORM object
+    await db.execute(insert(Listing), rows)
+    created = [item["title"] for item in _DEMO_ITEMS]
 
     # Update user stats
     user.total_listings += len(created)
@@ -1,10 +1,13 @@
 """User endpoints."""
 
+import asyncio
 import hashlib
+import hmac
+import re
 from datetime import UTC, datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,12 +19,38 @@ from app.models.user import User
 from app.models.listing import Listing, ListingStatus
 
 
+# scrypt parameters (memory-hard; ~16MB per hash)
+_SCRYPT_N = 2 ** 14
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+
 def hash_passcode(passcode: str, salt: str) -> str:
-    """Hash a passcode with salt."""
-    return hashlib.sha256(f"{passcode}:{salt}".encode()).hexdigest()
+    """Hash a passcode with salt using scrypt."""
+    derived = hashlib.scrypt(
+        passcode.encode(), salt=salt.encode(),
+        n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P,
+    )
+    return f"scrypt${derived.hex()}"
+
+
+def check_passcode(passcode: str, salt: str, passcode_hash: str) -> bool:
+    """Verify a passcode against a stored hash in constant time."""
+    if passcode_hash.startswith("scrypt$"):
+        return hmac.compare_digest(hash_passcode(passcode, salt), passcode_hash)
+    # Legacy unsalted-KDF hashes from before the scrypt switch
+    legacy = hashlib.sha256(f"{passcode}:{salt}".encode()).hexdigest()
+    return hmac.compare_digest(legacy, passcode_hash)
 
 router = APIRouter()
 
+# Captured once at import; checked on every request
+_ADMIN_IDS = settings.admin_ids
+
+# Phone normalization, compiled once at import
+_PHONE_STRIP_RE = re.compile(r"[\s\-]")
+_PHONE_LEAD_RE = re.compile(r"^(?:251|0)")
+
 
 class UserResponse(BaseModel):
     """User data response."""
@@ -68,7 +97,7 @@ def user_to_response(user: User) -> UserResponse:
         total_sales=user.total_sales,
         total_listings=user.total_listings,
         is_verified_seller=user.is_verified_seller,
-        is_admin=user.telegram_id in settings.admin_ids,
+        is_admin=user.telegram_id in _ADMIN_IDS,
         has_passcode=user.passcode_hash is not None,
         settings=user.settings or {},
     )
@@ -91,8 +120,15 @@ class VerifyPhoneRequest(BaseModel):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(user: CurrentUser):
+async def get_me(user: CurrentUser, request: Request, response: Response):
     """Get current user profile."""
+    # Short-circuit with 304 when the profile hasn't changed since the
+    # client's cached copy; skips serialization and transfer entirely.
+    etag = f'W/"{user.updated_at.timestamp()}-{user.id}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    response.headers["ETag"] = etag
     return user_to_response(user)
 
 
@@ -116,18 +152,12 @@ async def verify_phone(
     user: CurrentUser,
 ):
     """Verify user's phone number from Telegram contact share."""
-    # Clean phone number
-    phone = body.phone_number.strip().replace(" ", "").replace("-", "")
-    
-    # Ensure it starts with + or country code
+    # Strip whitespace/dashes and prepend the Ethiopian country code
+    # (numbers already in international format are kept as-is)
+    phone = _PHONE_STRIP_RE.sub("", body.phone_number)
     if not phone.startswith("+"):
-        if phone.startswith("0"):
-            phone = "+251" + phone[1:]  # Ethiopia
-        elif phone.startswith("251"):
-            phone = "+" + phone
-        else:
-            phone = "+251" + phone
-    
+        phone = "+251" + _PHONE_LEAD_RE.sub("", phone, count=1)
+
     # Update user
     user.phone = phone
     user.is_phone_verified = True
@@ -174,9 +204,10 @@ async def set_passcode(
     user: CurrentUser,
 ):
     """Set or update passcode for app lock."""
-    # Hash passcode with user's telegram_id as salt
+    # Hash passcode with user's telegram_id as salt; scrypt is deliberately
+    # slow (~50ms, 16MB), so run it off the event loop
     salt = str(user.telegram_id)
-    user.passcode_hash = hash_passcode(body.passcode, salt)
+    user.passcode_hash = await asyncio.to_thread(hash_passcode, body.passcode, salt)
     
     return PasscodeResponse(
         success=True,
@@ -194,9 +225,11 @@ async def verify_passcode(
         raise HTTPException(status_code=400, detail="No passcode set")
     
     salt = str(user.telegram_id)
-    if hash_passcode(body.passcode, salt) != user.passcode_hash:
+    if not await asyncio.to_thread(
+        check_passcode, body.passcode, salt, user.passcode_hash
+    ):
         raise HTTPException(status_code=401, detail="Invalid passcode")
-    
+
     return PasscodeResponse(
         success=True,
         message="Passcode verified"
@@ -214,7 +247,9 @@ async def remove_passcode(
     
     # Verify current passcode first
     salt = str(user.telegram_id)
-    if hash_passcode(body.passcode, salt) != user.passcode_hash:
+    if not await asyncio.to_thread(
+        check_passcode, body.passcode, salt, user.passcode_hash
+    ):
         raise HTTPException(status_code=401, detail="Invalid passcode")
     
     user.passcode_hash = None
@@ -1,5 +1,7 @@
 """Application configuration."""
 
+from functools import cached_property
+
 from pydantic_settings import BaseSettings
 
 
@@ -14,12 +16,14 @@ class Settings(BaseSettings):
     S3_BUCKET: str = "gebeya-uploads"
     S3_REGION: str = "us-east-1"
     
-    @property
-    def admin_ids(self) -> set[int]:
-        """Parse admin Telegram IDs."""
+    @cached_property
+    def admin_ids(self) -> frozenset[int]:
+        """Parse admin Telegram IDs (computed once, O(1) membership)."""
         if not self.ADMIN_TELEGRAM_IDS:
-            return set()
-        return {int(x.strip()) for x in self.ADMIN_TELEGRAM_IDS.split(",") if x.strip()}
+            return frozenset()
+        return frozenset(
+            int(x.strip()) for x in self.ADMIN_TELEGRAM_IDS.split(",") if x.strip()
+        )
 
     """Application settings loaded from environment."""
 
@@ -40,6 +44,9 @@ class Settings(BaseSettings):
 
     # Security
     SECRET_KEY: str = "change-me-in-production"
+    # Shared token letting internal (server-to-server) traffic skip rate
+    # limiting; disabled when empty
+    INTERNAL_BYPASS_TOKEN: str = ""
     JWT_SECRET: str = "change-me-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 60 * 24 * 7  # 7 days
@@ -0,0 +1,30 @@
+"""Shared HTTP client with connection pooling.
+
+One pooled AsyncClient for all outbound calls (Telegram, Catbox) so warm
+requests reuse TCP/TLS connections and HTTP/2 streams instead of paying a
+full handshake per call.
+"""
+
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it lazily."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (called from the app lifespan)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -2,7 +2,7 @@
 
 import hashlib
 import hmac
-import json
+import orjson
 from datetime import UTC, datetime, timedelta
 from typing import Any
 from urllib.parse import parse_qsl, unquote
@@ -59,7 +59,7 @@ def validate_telegram_init_data(init_data: str) -> dict | None:
 
         # Parse user data
         if "user" in parsed:
-            parsed["user"] = json.loads(unquote(parsed["user"]))
+            parsed["user"] = orjson.loads(unquote(parsed["user"]))
 
         return parsed
 
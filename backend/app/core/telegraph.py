@@ -5,16 +5,34 @@ No API key required. URLs never expire.
 Alternative to Telegraph which has issues.
 """
 
+import asyncio
 import httpx
-import base64
+import binascii
+import pybase64
 import re
+import string
+from secrets import token_hex
 from typing import Optional
 
+from app.core.http import get_http_client
+
 CATBOX_UPLOAD_URL = "https://catbox.moe/user/api.php"
 
 # Max file size: 200MB (Catbox limit)
 MAX_FILE_SIZE = 200 * 1024 * 1024
 
+# Base64 chars decoded per chunk when streaming (must be a multiple of 4)
+_B64_CHUNK = 65536
+
+# Concurrent Catbox uploads per process_images call
+_UPLOAD_CONCURRENCY = 4
+
+# Data-URL prefix, compiled once (DOTALL: payloads may contain newlines)
+_DATA_URL_RE = re.compile(r'data:image/(\w+);base64,(.+)', re.DOTALL)
+
+# Strips whitespace/junk from a chunk before decoding (rare path)
+_B64_JUNK_RE = re.compile(r'[^A-Za-z0-9+/=]+')
+
 
 class ImageUploadError(Exception):
     """Raised when image upload fails."""
@@ -41,26 +59,27 @@ async def upload_to_catbox(image_data: bytes, filename: str = "image.jpg") -> st
     if len(image_data) < 100:
         raise ImageUploadError("File too small - may be invalid")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(
-                CATBOX_UPLOAD_URL,
-                data={"reqtype": "fileupload"},
-                files={"fileToUpload": (filename, image_data)}
-            )
-            
-            result = response.text.strip()
-            
-            # Catbox returns the URL directly on success
-            if result.startswith("https://files.catbox.moe/"):
-                return result
-            else:
-                raise ImageUploadError(f"Upload failed: {result}")
-                
-        except httpx.HTTPStatusError as e:
-            raise ImageUploadError(f"HTTP error: {e.response.status_code}")
-        except httpx.RequestError as e:
-            raise ImageUploadError(f"Request failed: {str(e)}")
+    client = get_http_client()
+    try:
+        response = await client.post(
+            CATBOX_UPLOAD_URL,
+            data={"reqtype": "fileupload"},
+            files={"fileToUpload": (filename, image_data)},
+            timeout=60.0,
+        )
+
+        result = response.text.strip()
+
+        # Catbox returns the URL directly on success
+        if result.startswith("https://files.catbox.moe/"):
+            return result
+        else:
+            raise ImageUploadError(f"Upload failed: {result}")
+
+    except httpx.HTTPStatusError as e:
+        raise ImageUploadError(f"HTTP error: {e.response.status_code}")
+    except httpx.RequestError as e:
+        raise ImageUploadError(f"Request failed: {str(e)}")
 
 
 async def upload_base64_to_catbox(base64_string: str) -> str:
@@ -74,11 +93,22 @@ async def upload_base64_to_catbox(base64_string: str) -> str:
     Returns:
         Permanent Catbox URL
     """
+    # Size checks from the base64 length, before the data-URL regex runs
+    # (its capture group copies the whole payload) and before any decoding
+    payload_len = len(base64_string)
+    if base64_string.startswith('data:'):
+        payload_len -= base64_string.find(',') + 1
+    decoded_size = payload_len * 3 // 4 - base64_string[-2:].count('=')
+    if decoded_size > MAX_FILE_SIZE:
+        raise ImageUploadError(f"File too large. Max size: {MAX_FILE_SIZE // 1024 // 1024}MB")
+    if decoded_size < 100:
+        raise ImageUploadError("File too small - may be invalid")
+
     # Remove data URL prefix if present
     filename = "image.jpg"
     if base64_string.startswith('data:'):
         # Extract the base64 part after the comma
-        match = re.match(r'data:image/(\w+);base64,(.+)', base64_string)
+        match = _DATA_URL_RE.match(base64_string)
         if match:
             ext = match.group(1)
             if ext == 'jpeg':
@@ -89,13 +119,62 @@ async def upload_base64_to_catbox(base64_string: str) -> str:
             # Fallback: just remove everything before the comma
             base64_string = base64_string.split(',', 1)[-1]
     
-    # Decode base64
+    # Stream the decode: base64 is decoded in bounded chunks directly into
+    # the multipart body, so the full decoded bytes never sit in memory
+    boundary = token_hex(16)
+    client = get_http_client()
     try:
-        image_data = base64.b64decode(base64_string)
-    except Exception as e:
+        response = await client.post(
+            CATBOX_UPLOAD_URL,
+            content=_iter_multipart(base64_string, filename, boundary),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            timeout=60.0,
+        )
+
+        result = response.text.strip()
+
+        if result.startswith("https://files.catbox.moe/"):
+            return result
+        else:
+            raise ImageUploadError(f"Upload failed: {result}")
+
+    except binascii.Error as e:
         raise ImageUploadError(f"Invalid base64: {str(e)}")
-    
-    return await upload_to_catbox(image_data, filename)
+    except httpx.HTTPStatusError as e:
+        raise ImageUploadError(f"HTTP error: {e.response.status_code}")
+    except httpx.RequestError as e:
+        raise ImageUploadError(f"Request failed: {str(e)}")
+
+
+async def _iter_multipart(base64_string: str, filename: str, boundary: str):
+    """Yield a multipart/form-data body, decoding base64 chunk by chunk."""
+    yield (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="reqtype"\r\n\r\n'
+        "fileupload\r\n"
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="fileToUpload"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    # Non-alphabet chars (e.g. embedded newlines) would shift the 4-char
+    # alignment of fixed slices, so strip them and carry the remainder of
+    # each slice into the next — matching whole-string b64decode, which
+    # ignores such chars
+    carry = ""
+    for i in range(0, len(base64_string), _B64_CHUNK):
+        piece = base64_string[i:i + _B64_CHUNK]
+        if piece.translate(_NOT_BASE64):  # junk present (rare path)
+            piece = _B64_JUNK_RE.sub("", piece)
+        piece = carry + piece
+        usable = len(piece) & ~3
+        if usable:
+            # pybase64 decodes with SIMD (~10x the stdlib's scalar loop);
+            # raises binascii.Error on malformed input like the stdlib
+            yield pybase64.b64decode(piece[:usable], validate=False)
+        carry = piece[usable:]
+    if carry:
+        yield pybase64.b64decode(carry, validate=False)
+    yield f"\r\n--{boundary}--\r\n".encode()
 
 
 async def process_images(images: list[str]) -> list[str]:
@@ -108,38 +187,55 @@ async def process_images(images: list[str]) -> list[str]:
     Returns:
         List of URLs (Catbox URLs for uploaded images, original URLs for others)
     """
-    processed = []
-    
+    # Classify first, keeping original positions; URLs pass through as-is
+    slots: list[str | None] = []
+    pending: list[tuple[int, str]] = []
+
     for img in images:
         if not img:
             continue
-            
+
         # Check if it's already a URL (keep as-is)
         if img.startswith('http://') or img.startswith('https://'):
-            processed.append(img)
-            continue
-        
+            slots.append(img)
         # Check if it's base64 (with or without data URL prefix)
-        if img.startswith('data:image/') or _looks_like_base64(img):
-            try:
-                url = await upload_base64_to_catbox(img)
-                processed.append(url)
-                print(f"✅ Uploaded image to Catbox: {url}")
-            except ImageUploadError as e:
-                # Log error but continue with other images
-                print(f"⚠️ Image upload failed: {e}")
-                continue
+        elif img.startswith('data:image/') or _looks_like_base64(img):
+            pending.append((len(slots), img))
+            slots.append(None)
         else:
             # Unknown format, skip
             print(f"⚠️ Skipping unknown image format: {img[:50]}...")
-            continue
-    
-    return processed
+
+    # Fan the uploads out concurrently (bounded, to be polite to Catbox)
+    if pending:
+        sem = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+
+        async def _upload(img: str) -> Optional[str]:
+            async with sem:
+                try:
+                    url = await upload_base64_to_catbox(img)
+                    print(f"✅ Uploaded image to Catbox: {url}")
+                    return url
+                except ImageUploadError as e:
+                    # Log error but continue with other images
+                    print(f"⚠️ Image upload failed: {e}")
+                    return None
+
+        uploaded = await asyncio.gather(*(_upload(img) for _, img in pending))
+        for (idx, _), url in zip(pending, uploaded):
+            slots[idx] = url
+
+    return [url for url in slots if url is not None]
+
+
+# Deletes base64-alphabet chars; anything left over means non-base64
+_NOT_BASE64 = str.maketrans('', '', string.ascii_letters + string.digits + '+/=')
 
 
 def _looks_like_base64(s: str) -> bool:
     """Check if a string looks like base64-encoded data."""
     if len(s) < 100:  # Too short to be an image
         return False
-    # Base64 characters only (check first 100 chars)
-    return bool(re.match(r'^[A-Za-z0-9+/=]+$', s[:100]))
+    # Base64 characters only (check first 100 chars); translate runs the
+    # scan in C instead of the regex engine
+    return not s[:100].translate(_NOT_BASE64)
@@ -3,7 +3,9 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import (
+    Boolean, DateTime, ForeignKey, Index, String, Text, UniqueConstraint, func, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,6 +16,12 @@ class Chat(Base):
     """Chat conversation between buyer and seller."""
 
     __tablename__ = "chats"
+    __table_args__ = (
+        UniqueConstraint("listing_id", "buyer_id", name="uq_chats_listing_buyer"),
+        Index("ix_chats_buyer_active", "buyer_id", postgresql_where=text("is_active")),
+        Index("ix_chats_seller_active", "seller_id", postgresql_where=text("is_active")),
+        Index("ix_chats_last_msg", text("last_message_at DESC NULLS LAST")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -48,7 +56,10 @@ class Chat(Base):
     listing = relationship("Listing", back_populates="chats")
     buyer = relationship("User", foreign_keys=[buyer_id], backref="chats_as_buyer")
     seller = relationship("User", foreign_keys=[seller_id], backref="chats_as_seller")
-    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message", back_populates="chat", order_by="Message.created_at",
+        cascade="all, delete-orphan",
+    )
 
     def __repr__(self) -> str:
         return f"<Chat {self.id}>"
@@ -58,6 +69,10 @@ class Message(Base):
     """Individual message in a chat."""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_read", "chat_id", "is_read", postgresql_where=text("is_read = false")),
+        Index("ix_messages_chat_created", "chat_id", text("created_at DESC")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -1,12 +1,33 @@
 """Telegram notification service."""
 
-import httpx
+import asyncio
+import html
+import orjson
 import os
 from typing import Optional
 
+from app.core.http import get_http_client
+
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 BOT_USERNAME = os.getenv("BOT_USERNAME", "ContactNayaBot")
 
+# Seconds to buffer notifications before coalescing per-recipient sends
+_FLUSH_DELAY = 0.05
+
+# New-message notifications buffered per recipient between flushes
+_pending: dict[int, list[dict]] = {}
+_flush_task: Optional[asyncio.Task] = None
+
+# Constant template fragments, joined at send time instead of rebuilding
+# the full string through f-string interpolation per notification
+_SINGLE_PREFIX = "💬 <b>አዲስ መልእክት / New Message</b>\n\nከ <b>"
+_SINGLE_MID = "</b>\nስለ: "
+_SINGLE_PREVIEW = "\n\n<i>"
+_SINGLE_SUFFIX = "</i>"
+_BATCH_PREFIX = "💬 <b>"
+_BATCH_MID = " አዲስ መልእክቶች / New Messages</b>\n\nከ <b>"
+_BATCH_SUFFIX = "</b>"
+
 
 async def send_telegram_notification(
     telegram_id: int,
@@ -45,14 +66,20 @@ async def send_telegram_notification(
         payload["reply_markup"] = reply_markup
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, timeout=10.0)
-            
-            if response.status_code == 200:
-                return True
-            else:
-                print(f"Telegram API error: {response.status_code} - {response.text}")
-                return False
+        client = get_http_client()
+        # orjson-encoded body; httpx's json= kwarg would use stdlib json
+        response = await client.post(
+            url,
+            content=orjson.dumps(payload),
+            headers={"content-type": "application/json"},
+            timeout=10.0,
+        )
+
+        if response.status_code == 200:
+            return True
+        else:
+            print(f"Telegram API error: {response.status_code} - {response.text}")
+            return False
     except Exception as e:
         print(f"Failed to send Telegram notification: {e}")
         return False
@@ -64,21 +91,74 @@ async def notify_new_message(
     listing_title: str,
     message_preview: str,
     listing_id: str,
-) -> bool:
-    """Notify user about a new message."""
+) -> None:
+    """Queue a new-message notification (coalesced per recipient).
+
+    Notifications are buffered for a short window and sent as one
+    Telegram message per recipient, so a burst of messages costs one
+    API round trip instead of one per message (Telegram also enforces
+    30 msg/sec per bot).
+    """
     # Truncate message preview
     if len(message_preview) > 100:
         message_preview = message_preview[:97] + "..."
-    
-    text = (
-        f"💬 <b>አዲስ መልእክት / New Message</b>\n\n"
-        f"ከ <b>{sender_name}</b>\n"
-        f"ስለ: {listing_title}\n\n"
-        f"<i>{message_preview}</i>"
-    )
-    
+
+    _pending.setdefault(recipient_telegram_id, []).append({
+        "sender_name": sender_name,
+        "listing_title": listing_title,
+        "message_preview": message_preview,
+        "listing_id": listing_id,
+    })
+
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.ensure_future(_flush_after_delay())
+
+
+async def _flush_after_delay():
+    """Wait out the buffer window, then send one message per recipient.
+
+    Loops until the buffer is empty: notifications queued while a send
+    round is in flight land in a fresh buffer, and the re-check picks
+    them up instead of leaving them stranded until the next message.
+    """
+    global _pending
+    while _pending:
+        await asyncio.sleep(_FLUSH_DELAY)
+        pending, _pending = _pending, {}
+        if pending:
+            await asyncio.gather(*(
+                _send_batch(telegram_id, batch)
+                for telegram_id, batch in pending.items()
+            ))
+
+
+async def _send_batch(telegram_id: int, batch: list[dict]) -> bool:
+    """Send one notification covering all buffered messages for a user."""
+    # User-controlled fields are escaped so they can't break out of the
+    # HTML parse mode
+    if len(batch) == 1:
+        n = batch[0]
+        text = "".join((
+            _SINGLE_PREFIX,
+            html.escape(n["sender_name"]),
+            _SINGLE_MID,
+            html.escape(n["listing_title"]),
+            _SINGLE_PREVIEW,
+            html.escape(n["message_preview"]),
+            _SINGLE_SUFFIX,
+        ))
+    else:
+        senders = ", ".join(
+            dict.fromkeys(html.escape(n["sender_name"]) for n in batch)
+        )
+        text = "".join(
+            (_BATCH_PREFIX, str(len(batch)), _BATCH_MID, senders, _BATCH_SUFFIX)
+        )
+
     return await send_telegram_notification(
-        telegram_id=recipient_telegram_id,
+        telegram_id=telegram_id,
         text=text,
-        listing_id=listing_id,
+        # Deep-link to the most recent conversation
+        listing_id=batch[-1]["listing_id"],
     )
@@ -1,13 +1,29 @@
 """S3/MinIO storage service."""
 
+import asyncio
+import io
 import uuid
 from datetime import timedelta
+from typing import BinaryIO
 
 import boto3
+import orjson
+from boto3.s3.transfer import TransferConfig
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from urllib.parse import quote
 from botocore.config import Config
+from botocore.credentials import Credentials
 
 from app.core.config import settings
 
+# 8MB parts, 4 concurrent: memory stays bounded regardless of file size
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
 
 class StorageService:
     """S3-compatible storage service."""
@@ -22,9 +38,15 @@ class StorageService:
             config=Config(signature_version="s3v4"),
         )
         self.bucket = settings.S3_BUCKET
+        self._credentials = Credentials(
+            settings.S3_ACCESS_KEY, settings.S3_SECRET_KEY
+        )
 
-    def ensure_bucket(self):
+    async def ensure_bucket(self):
         """Create bucket if it doesn't exist."""
+        await asyncio.to_thread(self._ensure_bucket)
+
+    def _ensure_bucket(self):
         try:
             self.client.head_bucket(Bucket=self.bucket)
         except Exception:
@@ -42,51 +64,69 @@ class StorageService:
                         }
                     ],
                 }
-                import json
                 self.client.put_bucket_policy(
-                    Bucket=self.bucket, Policy=json.dumps(policy)
+                    Bucket=self.bucket, Policy=orjson.dumps(policy).decode()
                 )
             except Exception as e:
                 print(f"Failed to create bucket: {e}")
 
-    def upload_file(
+    async def upload_file(
         self,
-        file_data: bytes,
+        file_obj: BinaryIO | bytes,
         filename: str,
         content_type: str = "application/octet-stream",
         folder: str = "uploads",
     ) -> str:
-        """Upload file and return public URL."""
+        """Upload a file-like object (or bytes) and return public URL."""
+        if isinstance(file_obj, (bytes, bytearray)):
+            file_obj = io.BytesIO(file_obj)
+
         # Generate unique filename
         ext = filename.rsplit(".", 1)[-1] if "." in filename else ""
         unique_name = f"{folder}/{uuid.uuid4()}.{ext}" if ext else f"{folder}/{uuid.uuid4()}"
 
-        self.client.put_object(
-            Bucket=self.bucket,
-            Key=unique_name,
-            Body=file_data,
-            ContentType=content_type,
+        # Streams in 8MB parts instead of buffering the whole body; run in
+        # a worker thread so the S3 round-trip doesn't block the event loop
+        await asyncio.to_thread(
+            self.client.upload_fileobj,
+            file_obj,
+            self.bucket,
+            unique_name,
+            ExtraArgs={"ContentType": content_type},
+            Config=_TRANSFER_CONFIG,
         )
 
         # Return public URL
         return f"{settings.S3_ENDPOINT}/{self.bucket}/{unique_name}"
 
     def get_presigned_url(self, key: str, expires_in: int = 3600) -> str:
-        """Get presigned URL for upload."""
-        return self.client.generate_presigned_url(
-            "put_object",
-            Params={"Bucket": self.bucket, "Key": key},
-            ExpiresIn=expires_in,
+        """Get presigned URL for upload.
+
+        Signs the query string directly instead of going through
+        generate_presigned_url's endpoint/event dispatch stack.
+        """
+        request = AWSRequest(
+            method="PUT",
+            url=f"{settings.S3_ENDPOINT}/{self.bucket}/{quote(key)}",
         )
+        # The S3 variant signs UNSIGNED-PAYLOAD (plain SigV4QueryAuth
+        # hashes the empty body, so the client's actual PUT body would
+        # fail SignatureDoesNotMatch) and skips path normalization
+        S3SigV4QueryAuth(
+            self._credentials, "s3", settings.S3_REGION, expires=expires_in
+        ).add_auth(request)
+        return request.url
 
-    def delete_file(self, url: str) -> bool:
+    async def delete_file(self, url: str) -> bool:
         """Delete file by URL."""
         try:
             # Extract key from URL
             prefix = f"{settings.S3_ENDPOINT}/{self.bucket}/"
             if url.startswith(prefix):
                 key = url[len(prefix):]
-                self.client.delete_object(Bucket=self.bucket, Key=key)
+                await asyncio.to_thread(
+                    self.client.delete_object, Bucket=self.bucket, Key=key
+                )
                 return True
         except Exception as e:
             print(f"Failed to delete file: {e}")